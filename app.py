@@ -1,12 +1,31 @@
 # app.py
 
-from flask import Flask, request, jsonify, send_from_directory
+# O gevent precisa substituir socket/ssl/threading antes de qualquer outro import,
+# para que o PyMySQL e o servidor cedam a vez enquanto esperam por I/O
+from gevent import monkey
+monkey.patch_all()
+
+import gevent
+from gevent import get_hub
+from flask import Flask, Response, request, send_from_directory, make_response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
+from sqlalchemy import func, select
+from sqlalchemy.orm import raiseload, selectinload
 from flask_migrate import Migrate
 from flask_cors import CORS
+from collections import defaultdict
 from datetime import datetime
+from functools import wraps
+import base64
+import hashlib
+import itertools
+import orjson
 import os
-import uuid
+import shutil
+import struct
+import time
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
 # Importar load_dotenv
@@ -22,6 +41,9 @@ CORS(app)
 # Você pode pegar isso de uma variável de ambiente ou definir diretamente para desenvolvimento.
 # Para produção, você usaria o domínio real do seu backend (ex: https://api.meusite.com)
 BACKEND_BASE_URL = os.getenv('BACKEND_URL', 'http://localhost:5000') # Defina a porta do seu Flask aqui
+# Base das URLs de mídia. As listagens devolvem {"base": UPLOADS_BASE_URL, "items": [...]} com
+# url_midia relativa: o cliente monta base + url_midia (URLs externas http... vêm completas).
+UPLOADS_BASE_URL = f'{BACKEND_BASE_URL}/uploads/'
 
 # --- Configuração do Banco de Dados MySQL usando variáveis de ambiente ---
 MYSQL_USER = os.getenv('MYSQL_USER')
@@ -29,11 +51,28 @@ MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD')
 MYSQL_HOST = os.getenv('MYSQL_HOST')
 MYSQL_PORT = os.getenv('MYSQL_PORT')
 MYSQL_DB = os.getenv('MYSQL_DB')
+# Driver do SQLAlchemy. O padrão é o pymysql, em Python puro: com o monkey patch do gevent
+# suas esperas de rede cedem a vez às outras requisições. O mysqlclient (mysqldb, em C) lê
+# linhas mais rápido, mas bloqueia o processo inteiro a cada query; só use MYSQL_DRIVER=mysqldb
+# se o app rodar sem gevent (ex: gunicorn com workers sync).
+MYSQL_DRIVER = os.getenv('MYSQL_DRIVER', 'pymysql')
 
 app.config['SQLALCHEMY_DATABASE_URI'] = (
-    f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+    f"mysql+{MYSQL_DRIVER}://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
 )
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Com o gevent, várias requisições usam o banco ao mesmo tempo: o pool acompanha essa concorrência
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', '20')),
+    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+    'pool_pre_ping': True, # Descarta conexões derrubadas pelo MySQL (wait_timeout) antes de usá-las
+}
+
+# Com RAISELOAD ativo, as rotas de leitura de produtos levantam erro em qualquer
+# lazy load não previsto (ex: novo relacionamento usado em to_dict) em vez de
+# fazer uma query por item. Padrão: ativo apenas em modo debug.
+if os.getenv('RAISELOAD') is not None:
+    app.config['RAISELOAD'] = os.getenv('RAISELOAD') == '1'
 
 # Configuração da pasta de uploads para posts e produtos
 UPLOAD_FOLDER_POSTS = 'uploads/posts'
@@ -41,58 +80,167 @@ UPLOAD_FOLDER_PRODUCTS = 'uploads/products'
 app.config['UPLOAD_FOLDER_POSTS'] = UPLOAD_FOLDER_POSTS
 app.config['UPLOAD_FOLDER_PRODUCTS'] = UPLOAD_FOLDER_PRODUCTS
 
+# Tamanho máximo do corpo da requisição (uploads); acima disso o Flask responde 413
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', '512')) * 1024 * 1024
+
+# Tamanho dos blocos copiados ao gravar uploads (2 MiB, contra 16 KiB do file.save)
+UPLOAD_CHUNK_SIZE = 2 * 1024 * 1024
+
+# Tempo de cache (1 ano) dos arquivos servidos em /uploads
+UPLOAD_MAX_AGE = 31536000
+
+# No Linux, uploads grandes são copiados dentro do kernel (os.copy_file_range),
+# sem passar os bytes pelo Python. UPLOAD_KERNEL_COPY=0 desativa.
+app.config['UPLOAD_KERNEL_COPY'] = os.getenv('UPLOAD_KERNEL_COPY', '1') == '1'
+# Abaixo disso o Werkzeug mantém o upload em memória e a cópia normal é suficiente
+KERNEL_COPY_MIN_SIZE = 1024 * 1024
+
+# Cache dos dicts serializados (to_dict) de posts e produtos. Em produção use
+# CACHE_TYPE=RedisCache com CACHE_REDIS_URL, compartilhado entre os processos.
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'SimpleCache')
+app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.getenv('CACHE_DEFAULT_TIMEOUT', '3600'))
+
+# Em produção o nginx serve /uploads direto do disco (sendfile), sem passar pelo Flask:
+#   location /uploads/ {
+#       alias /srv/app/uploads/;
+#       sendfile on;
+#       tcp_nopush on;
+#       expires 1y;
+#       add_header Cache-Control "public, immutable";
+#   }
+# A rota /uploads do Flask fica ativa por padrão (desenvolvimento); em produção, com o
+# nginx servindo os arquivos, defina SERVE_UPLOADS=0.
+app.config['SERVE_UPLOADS'] = os.getenv('SERVE_UPLOADS', '1') == '1'
+# Para mídias que precisam passar por verificação de acesso, defina UPLOADS_ACCEL_PREFIX
+# (ex: /_protected/): a rota só responde com X-Accel-Redirect e o nginx envia o arquivo.
+#   location /_protected/ {
+#       internal;
+#       alias /srv/app/uploads/;
+#   }
+app.config['UPLOADS_ACCEL_PREFIX'] = os.getenv('UPLOADS_ACCEL_PREFIX')
+
+# Pasta no disco de cada prefixo dos caminhos salvos no banco ('posts/...', 'products/...')
+UPLOAD_FOLDERS = {
+    'posts': UPLOAD_FOLDER_POSTS,
+    'products': UPLOAD_FOLDER_PRODUCTS,
+}
+# Inverso, para o save_file montar o prefixo sem calcular os.path.basename a cada upload
+UPLOAD_FOLDER_KEYS = {folder: key for key, folder in UPLOAD_FOLDERS.items()}
+
 os.makedirs(UPLOAD_FOLDER_POSTS, exist_ok=True)
 os.makedirs(UPLOAD_FOLDER_PRODUCTS, exist_ok=True)
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
+cache = Cache(app)
 
 # Funções auxiliares para manipulação de arquivos
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi'}
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi'})
+VIDEO_EXTENSIONS = frozenset({'mp4', 'mov', 'avi'})
+
+def file_extension(filename):
+    # Extensão em minúsculas ('' se não houver); rpartition não cria lista como o rsplit
+    _, sep, ext = filename.rpartition('.')
+    return ext.lower() if sep else ''
 
 def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return file_extension(filename) in ALLOWED_EXTENSIONS
+
+def run_in_io_thread(func, *args):
+    # Arquivos em disco não são cooperativos no gevent: um write/remove bloquearia
+    # o servidor inteiro. A chamada roda numa thread nativa do threadpool do gevent
+    # e só a greenlet da requisição atual espera.
+    return get_hub().threadpool.apply(func, args)
+
+def upload_size(stream):
+    # Bytes restantes no stream do upload (o Werkzeug sempre entrega um stream com seek)
+    start = stream.tell()
+    size = stream.seek(0, os.SEEK_END) - start
+    stream.seek(start)
+    return size
+
+def kernel_copy(stream, dst, size):
+    # O Werkzeug guarda em arquivo temporário os uploads acima de ~500 KiB; nesse
+    # caso copy_file_range copia de um arquivo para o outro dentro do kernel.
+    # Retorna False (sem ter escrito nada em dst) quando não for possível.
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    start = stream.tell()
+    if size < KERNEL_COPY_MIN_SIZE:
+        return False
+    try:
+        src_fd = stream.fileno()
+        offset = start
+        while offset < start + size:
+            copied = os.copy_file_range(src_fd, dst.fileno(), start + size - offset, offset_src=offset)
+            if copied == 0:
+                break
+            offset += copied
+    except (OSError, AttributeError):
+        # Ex: stream em memória ou kernel/sistema de arquivos sem suporte
+        dst.seek(0)
+        dst.truncate()
+        stream.seek(start)
+        return False
+    return True
+
+def write_upload(stream, filepath):
+    # Sem fsync: uma mídia perdida num crash é reenviada pelo cliente, o writeback do SO basta
+    with open(filepath, 'wb', buffering=UPLOAD_CHUNK_SIZE) as dst:
+        size = upload_size(stream)
+        if size >= KERNEL_COPY_MIN_SIZE and hasattr(os, 'posix_fallocate'):
+            # Reserva o tamanho final de uma vez, em vez de o arquivo crescer a cada escrita
+            try:
+                os.posix_fallocate(dst.fileno(), 0, size)
+            except OSError:
+                pass # Ex: sistema de arquivos sem suporte; a cópia segue normalmente
+        if not (app.config['UPLOAD_KERNEL_COPY'] and kernel_copy(stream, dst, size)):
+            shutil.copyfileobj(stream, dst, UPLOAD_CHUNK_SIZE)
+        dst.truncate() # Se a cópia terminar antes do previsto, descarta o resto da reserva
+
+_upload_counter = itertools.count()
+
+def unique_id():
+    # Prefixo único dos arquivos salvos: tempo em ns + pid + contador do processo,
+    # em base32 (32 caracteres, seguro em URL). Não chama os.urandom como o uuid4.
+    raw = struct.pack('>QIQ', time.time_ns(), os.getpid(), next(_upload_counter))
+    return base64.b32encode(raw).decode().lower()
 
 def save_file(file, upload_folder):
     if file and allowed_file(file.filename):
         filename_base = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4().hex}_{filename_base}"
+        unique_filename = f"{unique_id()}_{filename_base}"
         filepath = os.path.join(upload_folder, unique_filename) # Caminho real no disco
-        file.save(filepath)
+        run_in_io_thread(write_upload, file.stream, filepath)
         
         # ALTERAÇÃO AQUI: Garante que o caminho para o DB e URL use sempre '/'
-        # os.path.basename(upload_folder) pega 'posts' ou 'products'
-        return f"{os.path.basename(upload_folder)}/{unique_filename}" 
+        # UPLOAD_FOLDER_KEYS dá 'posts' ou 'products'
+        return f"{UPLOAD_FOLDER_KEYS[upload_folder]}/{unique_filename}"
     return None
 
-def delete_file(filepath_relative):
-    # ATENÇÃO: Se o filepath_relative agora virá com '/', o os.sep não funcionará diretamente para split.
-    # Você precisará usar o '/' como separador para split e join para apagar.
-    # O folder_name deve ser o primeiro elemento da string 'posts/nome_arquivo.png'
-    # O nome do arquivo real será o segundo elemento.
-    
-    # Ex: filepath_relative = 'products/5a9c0bcef5bf707474128f309e307e2_7047.png'
-    # folder_name = 'products'
-    # filename_only = '5a9c0bcef5bf707474128f309e307e2_7047.png'
-    
-    if filepath_relative:
-        parts = filepath_relative.split('/') # Usa '/' como separador, já que agora salvamos assim
-        if len(parts) < 2: # Garante que há pelo menos 'folder/filename'
-            return False # Caminho inválido para exclusão
+def split_upload_path(relative_path):
+    # 'products/5a9c..._7047.png' -> ('products', '5a9c..._7047.png', 'uploads/products/5a9c..._7047.png').
+    # Retorna None para pasta desconhecida ou nome que sairia da pasta (ex: 'posts/../app.py',
+    # 'posts/..\\..\\app.py'): o url_midia de um post pode vir do formulário do PUT.
+    folder_key, _, filename_only = relative_path.partition('/')
+    if folder_key not in UPLOAD_FOLDERS or not filename_only or '/' in filename_only or '\\' in filename_only:
+        return None
+    full_path = safe_join(UPLOAD_FOLDERS[folder_key], filename_only)
+    if full_path is None:
+        return None
+    return folder_key, filename_only, full_path
 
-        folder_name = parts[0] # 'posts' ou 'products'
-        filename_only = parts[1] # 'nome_do_arquivo.ext'
-        
-        full_path = None
-        if folder_name == 'posts':
-            full_path = os.path.join(app.config['UPLOAD_FOLDER_POSTS'], filename_only)
-        elif folder_name == 'products':
-            full_path = os.path.join(app.config['UPLOAD_FOLDER_PRODUCTS'], filename_only)
-        
-        if full_path and os.path.exists(full_path):
-            os.remove(full_path)
-            return True
+def delete_file(filepath_relative):
+    # filepath_relative vem do banco no formato 'posts/nome_arquivo.png'
+    parts = split_upload_path(filepath_relative) if filepath_relative else None
+    if parts is None:
+        return False # Caminho inválido para exclusão
+
+    _, _, full_path = parts
+    if os.path.exists(full_path):
+        run_in_io_thread(os.remove, full_path)
+        return True
     return False
 
 # --- Modelos de Banco de Dados ---
@@ -103,9 +251,16 @@ class Post(db.Model):
     tipo_midia = db.Column(db.String(50), nullable=False)
     url_midia = db.Column(db.String(255), nullable=True)
     plataformas = db.Column(db.String(255), nullable=False)
-    data_agendamento = db.Column(db.DateTime, nullable=False)
+    data_agendamento = db.Column(db.DateTime, nullable=False, index=True)
     status = db.Column(db.String(50), default='agendado')
     data_publicacao = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+    # Incrementada a cada escrita (bump_version); valida o cache do to_dict
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # Consultas de posts agendados vencidos: WHERE status = ... AND data_agendamento <= ...
+    # (também atende filtros só por status, por ser o prefixo do índice)
+    __table_args__ = (db.Index('ix_post_status_data_agendamento', 'status', 'data_agendamento'),)
 
     def to_dict(self):
         return {
@@ -116,16 +271,16 @@ class Post(db.Model):
             # Caso contrário, construa a URL completa baseada no caminho relativo salvo.
             'url_midia': self.get_full_media_url(self.url_midia) if self.url_midia and not self.url_midia.startswith('http') else self.url_midia,
             'plataformas': self.plataformas,
-            'data_agendamento': self.data_agendamento.isoformat(),
+            'data_agendamento': self.data_agendamento, # O ojsonify (orjson) serializa datetime em ISO 8601
             'status': self.status,
-            'data_publicacao': self.data_publicacao.isoformat() if self.data_publicacao else None
+            'data_publicacao': self.data_publicacao
         }
     
     def get_full_media_url(self, relative_path):
         # ALTERAÇÃO AQUI: Simplificação, já que relative_path deve vir formatado com '/'
         # E a rota `/uploads/<path:filename>` espera o caminho relativo completo (ex: 'posts/imagem.png')
         if relative_path:
-            return f'{BACKEND_BASE_URL}/uploads/{relative_path}'
+            return f'{UPLOADS_BASE_URL}{relative_path}'
         return None # Ou um placeholder para imagem/video faltando
 
 class Product(db.Model):
@@ -135,7 +290,10 @@ class Product(db.Model):
     age_classification = db.Column(db.String(50), nullable=False)
     price = db.Column(db.Float, nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    media = db.relationship('ProductMedia', backref='product', lazy=True, cascade="all, delete-orphan")
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+    # Incrementada a cada escrita (bump_version); valida o cache do to_dict
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    media = db.relationship('ProductMedia', backref='product', lazy='select', cascade="all, delete-orphan")
 
     def to_dict(self):
         return {
@@ -150,7 +308,7 @@ class Product(db.Model):
 
 class ProductMedia(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     url_midia = db.Column(db.String(255), nullable=False)
     tipo_midia = db.Column(db.String(50), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
@@ -167,31 +325,111 @@ class ProductMedia(db.Model):
     def get_full_media_url(self, relative_path):
         # Este método já estava correto para o retorno esperado (ex: '/uploads/products/imagem.png')
         if relative_path:
-            return f'{BACKEND_BASE_URL}/uploads/{relative_path}'
+            return f'{UPLOADS_BASE_URL}{relative_path}'
         return None # Ou um placeholder para imagem/video faltando
 
+def product_load_options():
+    options = [selectinload(Product.media)]
+    if app.config.get('RAISELOAD', app.debug):
+        options.append(raiseload('*'))
+    return options
+
+# Colunas devolvidas pelas listagens (as mesmas do to_dict, sem updated_at/version)
+POST_LIST_COLUMNS = [c for c in Post.__table__.c if c.name not in ('updated_at', 'version')]
+PRODUCT_LIST_COLUMNS = [c for c in Product.__table__.c if c.name not in ('updated_at', 'version')]
+
+def ojsonify(obj, status=200):
+    # orjson serializa em C (inclusive datetime, no mesmo formato do isoformat);
+    # OPT_SORT_KEYS mantém a ordem de chaves do jsonify
+    return Response(orjson.dumps(obj, option=orjson.OPT_SORT_KEYS), status=status, mimetype='application/json')
+
+def cache_key(obj):
+    return f'{type(obj).__name__}:{obj.id}'
+
+def uncache(key):
+    # Usado ao excluir uma linha: um registro novo que reaproveite o id começa de novo em
+    # version=1 e casaria com a entrada antiga. Recebe a chave, calculada antes do delete.
+    cache.delete(key)
+
+def cached_dicts(objs):
+    # to_dict memoizado por (modelo, id). A entrada guarda a version da linha e só
+    # é usada enquanto ele não mudar; um único get_many/set_many por requisição.
+    keys = [cache_key(obj) for obj in objs]
+    hits = cache.get_many(*keys) if keys else []
+    result = []
+    misses = {}
+    for obj, key, hit in zip(objs, keys, hits):
+        if hit is not None and hit[0] == obj.version:
+            result.append(hit[1])
+        else:
+            data = obj.to_dict()
+            misses[key] = (obj.version, data)
+            result.append(data)
+    if misses:
+        cache.set_many(misses)
+    return result
+
+def bump_version(obj):
+    # Incremento feito no próprio UPDATE (version = version + 1): toda escrita gera uma
+    # versão nova, mesmo no mesmo segundo ou com cache local de outro processo. Uma
+    # entrada antiga gravada depois da escrita (leitura concorrente) nunca volta a valer.
+    obj.version = type(obj).version + 1
+
+def with_etag(view):
+    # Adiciona um ETag (hash do corpo JSON) às respostas 200 da rota; se o cliente
+    # envia If-None-Match com a mesma versão, responde 304 sem reenviar o corpo.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest())
+        response.headers['Cache-Control'] = 'no-cache' # Sempre revalida com o ETag
+        return response.make_conditional(request)
+    return wrapper
+
 # --- Rotas para servir arquivos estáticos de uploads ---
-@app.route('/uploads/<path:filename>')
+# Em produção quem serve /uploads é o nginx (ver SERVE_UPLOADS e UPLOADS_ACCEL_PREFIX)
 def uploaded_file(filename):
     # O 'filename' aqui já virá como 'posts/nome.png' ou 'products/nome.png'
     # Os send_from_directory precisam apenas do 'nome.png' e da pasta base 'uploads/posts' ou 'uploads/products'
-    if filename.startswith('posts/'):
-        return send_from_directory(app.config['UPLOAD_FOLDER_POSTS'], filename.replace('posts/', ''))
-    elif filename.startswith('products/'):
-        return send_from_directory(app.config['UPLOAD_FOLDER_PRODUCTS'], filename.replace('products/', ''))
-    return jsonify({"message": "File not found"}), 404
+    parts = split_upload_path(filename)
+    if parts is None:
+        return ojsonify({"message": "File not found"}, 404)
+
+    folder_key, filename_only, _ = parts
+    accel_prefix = app.config['UPLOADS_ACCEL_PREFIX']
+    if accel_prefix:
+        # Verificações de acesso à mídia entram aqui, antes de liberar o arquivo
+        response = Response(headers={'X-Accel-Redirect': f"{accel_prefix.rstrip('/')}/{folder_key}/{filename_only}"})
+        response.headers['Content-Type'] = '' # Deixa o nginx definir pelo tipo do arquivo
+    else:
+        response = send_from_directory(UPLOAD_FOLDERS[folder_key], filename_only, max_age=UPLOAD_MAX_AGE)
+    # Os nomes levam um prefixo único (unique_id) e nunca são reaproveitados: o conteúdo de uma URL não muda.
+    # send_from_directory já responde 304 a If-None-Match / If-Modified-Since.
+    # Mídia protegida não pode ficar em caches compartilhados (proxy/CDN)
+    visibility = 'private' if accel_prefix else 'public'
+    response.headers['Cache-Control'] = f'{visibility}, max-age={UPLOAD_MAX_AGE}, immutable'
+    return response
+
+if app.config['SERVE_UPLOADS'] or app.config['UPLOADS_ACCEL_PREFIX']:
+    app.add_url_rule('/uploads/<path:filename>', view_func=uploaded_file)
 
 # --- Rotas da API para Posts ---
 
 @app.route('/posts', methods=['GET'])
+@with_etag
 def get_posts():
-    posts = Post.query.all()
-    return jsonify([post.to_dict() for post in posts])
+    # Listagem direto pelo Core: linhas simples em vez de objetos ORM + to_dict por post.
+    # url_midia sai como está no banco, relativa a "base"
+    rows = db.session.execute(select(*POST_LIST_COLUMNS)).mappings()
+    return ojsonify({'base': UPLOADS_BASE_URL, 'items': [dict(row) for row in rows]})
 
 @app.route('/posts/<int:id>', methods=['GET'])
+@with_etag
 def get_post(id):
     post = Post.query.get_or_404(id)
-    return jsonify(post.to_dict())
+    return ojsonify(cached_dicts([post])[0])
 
 @app.route('/posts', methods=['POST'])
 def create_post():
@@ -201,12 +439,12 @@ def create_post():
     data_agendamento_str = request.form.get('data_agendamento')
 
     if not all([legenda, tipo_midia, plataformas, data_agendamento_str]):
-        return jsonify({"message": "Dados obrigatórios faltando"}), 400
+        return ojsonify({"message": "Dados obrigatórios faltando"}, 400)
 
     try:
         data_agendamento = datetime.fromisoformat(data_agendamento_str.replace('Z', '+00:00'))
     except ValueError:
-        return jsonify({"message": "Formato de data e hora inválido"}), 400
+        return ojsonify({"message": "Formato de data e hora inválido"}, 400)
 
     url_midia = None
     if 'media_file' in request.files:
@@ -216,7 +454,7 @@ def create_post():
             if relative_filepath:
                 url_midia = relative_filepath 
             else:
-                return jsonify({"message": "Tipo de arquivo de mídia não permitido"}), 400
+                return ojsonify({"message": "Tipo de arquivo de mídia não permitido"}, 400)
     elif request.form.get('url_midia'):
         url_midia = request.form.get('url_midia')
 
@@ -230,7 +468,7 @@ def create_post():
     )
     db.session.add(new_post)
     db.session.commit()
-    return jsonify(new_post.to_dict()), 201
+    return ojsonify(new_post.to_dict(), 201)
 
 @app.route('/posts/<int:id>', methods=['PUT'])
 def update_post(id):
@@ -242,12 +480,12 @@ def update_post(id):
     data_agendamento_str = request.form.get('data_agendamento')
 
     if not all([legenda, tipo_midia, plataformas, data_agendamento_str]):
-        return jsonify({"message": "Dados obrigatórios faltando"}), 400
+        return ojsonify({"message": "Dados obrigatórios faltando"}, 400)
 
     try:
         data_agendamento = datetime.fromisoformat(data_agendamento_str.replace('Z', '+00:00'))
     except ValueError:
-        return jsonify({"message": "Formato de data e hora inválido"}), 400
+        return ojsonify({"message": "Formato de data e hora inválido"}, 400)
 
     new_url_midia_form = request.form.get('url_midia')
     existing_url_midia = post.url_midia
@@ -261,7 +499,7 @@ def update_post(id):
         if relative_filepath:
             post.url_midia = relative_filepath
         else:
-            return jsonify({"message": "Tipo de arquivo de mídia não permitido"}), 400
+            return ojsonify({"message": "Tipo de arquivo de mídia não permitido"}, 400)
     elif new_url_midia_form == '':
         if existing_url_midia and not existing_url_midia.startswith('http'):
             delete_file(existing_url_midia)
@@ -275,30 +513,135 @@ def update_post(id):
     post.tipo_midia = tipo_midia
     post.plataformas = ','.join(plataformas)
     post.data_agendamento = data_agendamento
+    bump_version(post)
 
     db.session.commit()
-    return jsonify(post.to_dict())
+    return ojsonify(post.to_dict())
 
 @app.route('/posts/<int:id>', methods=['DELETE'])
 def delete_post(id):
     post = Post.query.get_or_404(id)
     if post.url_midia and not post.url_midia.startswith('http'):
         delete_file(post.url_midia)
+    key = cache_key(post)
     db.session.delete(post)
     db.session.commit()
-    return jsonify({"message": "Post excluído com sucesso"})
+    uncache(key)
+    return ojsonify({"message": "Post excluído com sucesso"})
 
 # --- Rotas da API para Produtos ---
 
+def save_product_media():
+    # Salva os arquivos de 'media_files' e devolve as linhas de ProductMedia (ainda sem
+    # product_id) para o insert_product_media.
+    files = [file for file in request.files.getlist('media_files') if file.filename != '']
+    # Cada save_file espera sua gravação no threadpool; rodando em greenlets separadas,
+    # as gravações dos N arquivos acontecem em paralelo (tempo ≈ o do maior arquivo)
+    jobs = [gevent.spawn(save_file, file, app.config['UPLOAD_FOLDER_PRODUCTS']) for file in files]
+    gevent.joinall(jobs)
+    failed = [job for job in jobs if job.exception is not None]
+    if failed:
+        # A requisição vai falhar sem inserir mídias: apaga os arquivos que chegaram a ser gravados
+        for job in jobs:
+            if job.successful() and job.value:
+                delete_file(job.value)
+        raise failed[0].exception
+
+    media_rows = []
+    for file, job in zip(files, jobs):
+        relative_filepath = job.value
+        if relative_filepath:
+            media_rows.append({
+                'url_midia': relative_filepath,
+                'tipo_midia': 'video' if file_extension(file.filename) in VIDEO_EXTENSIONS else 'imagem',
+                'filename': secure_filename(file.filename)
+            })
+        else:
+            print(f"Tipo de arquivo não permitido para: {file.filename}")
+    return media_rows
+
+def insert_product_media(product_id, media_rows):
+    # Todas as ProductMedia num único INSERT com executemany (em vez de um INSERT por arquivo)
+    if media_rows:
+        db.session.execute(ProductMedia.__table__.insert(),
+                           [dict(row, product_id=product_id) for row in media_rows])
+
+def discard_product_media(media_rows):
+    # Apaga os arquivos salvos por save_product_media quando a transação falha
+    for row in media_rows:
+        delete_file(row['url_midia'])
+
+# Quantos produtos a listagem lê (e serializa) por vez
+PRODUCTS_BATCH_SIZE = 1000
+
+def iter_product_batches():
+    # Produtos em lotes de PRODUCTS_BATCH_SIZE, paginados por id (keyset), cada lote com as
+    # mídias dos seus produtos: duas queries pelo Core por lote (evita N+1) e memória O(lote).
+    # url_midia das mídias sai relativa a "base"
+    last_id = 0
+    while True:
+        products = db.session.execute(
+            select(*PRODUCT_LIST_COLUMNS)
+            .where(Product.id > last_id)
+            .order_by(Product.id)
+            .limit(PRODUCTS_BATCH_SIZE)
+        ).mappings().all()
+        if not products:
+            return
+        last_id = products[-1]['id']
+
+        media_by_product = defaultdict(list)
+        media_rows = db.session.execute(
+            select(ProductMedia.__table__)
+            .where(ProductMedia.product_id.in_([product['id'] for product in products]))
+            .order_by(ProductMedia.id)
+        ).mappings()
+        for media in media_rows:
+            media_by_product[media['product_id']].append(dict(media))
+        yield [dict(product, media=media_by_product[product['id']]) for product in products]
+
+        if len(products) < PRODUCTS_BATCH_SIZE:
+            return
+
+def products_etag():
+    # Validador da listagem sem montar o corpo: muda com inclusão/exclusão de produtos e com
+    # toda escrita em um produto ou nas suas mídias (que incrementam Product.version)
+    count, max_id, version_sum, last_update = db.session.execute(
+        select(func.count(), func.max(Product.id), func.sum(Product.version), func.max(Product.updated_at))
+    ).one()
+    state = f'{UPLOADS_BASE_URL}|{count}|{max_id}|{version_sum}|{last_update}'
+    return hashlib.blake2b(state.encode(), digest_size=16).hexdigest()
+
 @app.route('/products', methods=['GET'])
 def get_products():
-    products = Product.query.all()
-    return jsonify([p.to_dict() for p in products])
+    # O JSON é enviado em partes, um lote de produtos por vez, sem montar a lista inteira.
+    # Como o with_etag precisaria do corpo completo, o ETag vem de products_etag e um
+    # cliente atualizado recebe 304 sem que os lotes sejam lidos.
+    etag = products_etag()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def generate():
+        yield b'{"base":' + orjson.dumps(UPLOADS_BASE_URL) + b',"items":['
+        separator = b''
+        for items in iter_product_batches():
+            yield separator + orjson.dumps(items, option=orjson.OPT_SORT_KEYS)[1:-1] # Sem os []
+            separator = b','
+        yield b']}'
+
+    response = Response(stream_with_context(generate()), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache' # Sempre revalida com o ETag
+    return response
 
 @app.route('/products/<int:id>', methods=['GET'])
+@with_etag
 def get_product(id):
-    product = Product.query.get_or_404(id)
-    return jsonify(product.to_dict())
+    product = Product.query.options(*product_load_options()).get_or_404(id)
+    return ojsonify(cached_dicts([product])[0])
 
 @app.route('/products', methods=['POST'])
 def create_product():
@@ -309,13 +652,13 @@ def create_product():
     quantity = request.form.get('quantity')
 
     if not all([name, age_classification, price is not None, quantity is not None]):
-        return jsonify({"message": "Dados obrigatórios faltando"}), 400
+        return ojsonify({"message": "Dados obrigatórios faltando"}, 400)
 
     try:
         price = float(price)
         quantity = int(quantity)
     except ValueError:
-        return jsonify({"message": "Preço ou quantidade inválidos"}), 400
+        return ojsonify({"message": "Preço ou quantidade inválidos"}, 400)
 
     new_product = Product(
         name=name,
@@ -324,27 +667,19 @@ def create_product():
         price=price,
         quantity=quantity
     )
-    db.session.add(new_product)
-    db.session.commit()
-
-    if 'media_files' in request.files:
-        files = request.files.getlist('media_files')
-        for file in files:
-            if file.filename == '':
-                continue
-            relative_filepath = save_file(file, app.config['UPLOAD_FOLDER_PRODUCTS'])
-            if relative_filepath:
-                new_media = ProductMedia(
-                    product_id=new_product.id,
-                    url_midia=relative_filepath,
-                    tipo_midia='imagem' if file.mimetype.startswith('image/') else 'video',
-                    filename=secure_filename(file.filename)
-                )
-                db.session.add(new_media)
-            else:
-                print(f"Tipo de arquivo não permitido para: {file.filename}")
-    db.session.commit()
-    return jsonify(new_product.to_dict()), 201
+    # Arquivos primeiro: a cópia para o disco (até MAX_CONTENT_LENGTH) não segura uma
+    # conexão do pool nem a transação do INSERT abertas
+    media_rows = save_product_media()
+    try:
+        db.session.add(new_product)
+        db.session.flush() # Gera o new_product.id sem commit: produto e mídias vão num único commit
+        insert_product_media(new_product.id, media_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        discard_product_media(media_rows)
+        raise
+    return ojsonify(new_product.to_dict(), 201)
 
 @app.route('/products/<int:id>', methods=['PUT'])
 def update_product(id):
@@ -360,33 +695,24 @@ def update_product(id):
         price = float(price_str)
         quantity = int(quantity_str)
     except ValueError:
-        return jsonify({"message": "Preço ou quantidade inválidos"}), 400
+        return ojsonify({"message": "Preço ou quantidade inválidos"}, 400)
 
     product.name = name
     product.description = description
     product.age_classification = age_classification
     product.price = price
     product.quantity = quantity
+    bump_version(product) # Mídias novas também mudam o to_dict do produto
 
-    if 'media_files' in request.files:
-        files = request.files.getlist('media_files')
-        for file in files:
-            if file.filename == '':
-                continue
-            relative_filepath = save_file(file, app.config['UPLOAD_FOLDER_PRODUCTS'])
-            if relative_filepath:
-                new_media = ProductMedia(
-                    product_id=product.id,
-                    url_midia=relative_filepath,
-                    tipo_midia='imagem' if file.mimetype.startswith('image/') else 'video',
-                    filename=secure_filename(file.filename)
-                )
-                db.session.add(new_media)
-            else:
-                print(f"Tipo de arquivo não permitido para: {file.filename}")
-
-    db.session.commit()
-    return jsonify(product.to_dict())
+    media_rows = save_product_media()
+    try:
+        insert_product_media(product.id, media_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        discard_product_media(media_rows)
+        raise
+    return ojsonify(product.to_dict())
 
 @app.route('/products/<int:product_id>/media/<int:media_id>', methods=['DELETE'])
 def delete_product_media(product_id, media_id):
@@ -395,9 +721,12 @@ def delete_product_media(product_id, media_id):
     if media.url_midia:
         delete_file(media.url_midia)
     
+    bump_version(media.product)
+    key = cache_key(media.product)
     db.session.delete(media)
     db.session.commit()
-    return jsonify({"message": "Mídia do produto excluída com sucesso"}), 200
+    uncache(key)
+    return ojsonify({"message": "Mídia do produto excluída com sucesso"}, 200)
 
 @app.route('/products/<int:id>', methods=['DELETE'])
 def delete_product(id):
@@ -405,12 +734,22 @@ def delete_product(id):
     for media_item in product.media:
         delete_file(media_item.url_midia)
 
+    key = cache_key(product)
     db.session.delete(product)
     db.session.commit()
-    return jsonify({"message": "Produto e suas mídias excluídos com sucesso"}), 200
+    uncache(key)
+    return ojsonify({"message": "Produto e suas mídias excluídos com sucesso"}, 200)
 
 if __name__ == '__main__':
+    from gevent.pywsgi import WSGIServer
+
     with app.app_context():
         pass # Migrações cuidam da criação das tabelas
 
-    app.run(debug=True)
\ No newline at end of file
+    # Como no antigo app.run(debug=True), 'python app.py' roda em modo debug (que também
+    # liga o RAISELOAD por padrão); FLASK_DEBUG=0 desativa
+    app.debug = os.getenv('FLASK_DEBUG', '1') == '1'
+
+    # Servidor WSGI do gevent: cada requisição roda em uma greenlet, então uploads
+    # e queries lentas não bloqueiam as demais (o servidor de desenvolvimento do Flask atende uma por vez)
+    WSGIServer(('0.0.0.0', int(os.getenv('PORT', '5000'))), app).serve_forever()
\ No newline at end of file
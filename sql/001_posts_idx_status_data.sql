@@ -0,0 +1,4 @@
+-- Índice composto para as consultas do agendador em app.pyold
+-- (status = 'agendado' AND data_agendamento <= / > ...), que passam a
+-- usar range scan em vez de varrer a tabela posts inteira.
+CREATE INDEX idx_status_data ON posts (status, data_agendamento);
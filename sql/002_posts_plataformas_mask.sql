@@ -0,0 +1,10 @@
+-- Bitmask das plataformas do post (instagram = 1, whatsapp = 2), usado pelo
+-- agendador em app.pyold no lugar de split(',') sobre a coluna plataformas.
+-- A coluna plataformas continua sendo a fonte exibida pela API.
+ALTER TABLE posts ADD COLUMN plataformas_mask TINYINT UNSIGNED NOT NULL DEFAULT 0;
+
+-- Mesma normalização do platforms_mask() em app.pyold: espaços, tabs e quebras
+-- de linha são removidos antes da busca ('instagram, whatsapp' -> 3).
+UPDATE posts SET plataformas_mask =
+    IF(FIND_IN_SET('instagram', REPLACE(REPLACE(REPLACE(REPLACE(plataformas, ' ', ''), '\t', ''), '\r', ''), '\n', '')) > 0, 1, 0) |
+    IF(FIND_IN_SET('whatsapp', REPLACE(REPLACE(REPLACE(REPLACE(plataformas, ' ', ''), '\t', ''), '\r', ''), '\n', '')) > 0, 2, 0);
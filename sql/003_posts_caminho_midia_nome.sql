@@ -0,0 +1,9 @@
+-- Registros antigos guardavam caminho_midia como 'uploads/nome.ext' (ou 'uploads\nome.ext');
+-- desde então o app.pyold grava apenas o nome do arquivo. Normaliza os antigos para o
+-- mesmo formato, para que a checagem de arquivos compartilhados (remove_unused_media)
+-- encontre todas as referências a um arquivo. URLs externas não são alteradas.
+UPDATE posts
+SET caminho_midia = SUBSTRING_INDEX(REPLACE(caminho_midia, '\\', '/'), '/', -1)
+WHERE caminho_midia NOT LIKE 'http://%'
+  AND caminho_midia NOT LIKE 'https://%'
+  AND (caminho_midia LIKE '%/%' OR caminho_midia LIKE '%\\\\%');
@@ -0,0 +1,7 @@
+-- Refaz o backfill de plataformas_mask para bancos onde a versão anterior de
+-- 002_posts_plataformas_mask.sql já rodou: ela não removia os espaços da lista
+-- ('instagram, whatsapp' ficava com mask 1), ao contrário do platforms_mask()
+-- usado pelo app.pyold nas gravações. Pode ser executado mais de uma vez.
+UPDATE posts SET plataformas_mask =
+    IF(FIND_IN_SET('instagram', REPLACE(REPLACE(REPLACE(REPLACE(plataformas, ' ', ''), '\t', ''), '\r', ''), '\n', '')) > 0, 1, 0) |
+    IF(FIND_IN_SET('whatsapp', REPLACE(REPLACE(REPLACE(REPLACE(plataformas, ' ', ''), '\t', ''), '\r', ''), '\n', '')) > 0, 2, 0);